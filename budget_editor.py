@@ -16,6 +16,8 @@ Usage:
   python budget_editor.py --input input.csv --output output.csv --income 4000 \
        [--bad_keywords "bad,fraud,error"]
 
+Omit --output to only print the summary without writing a revised CSV.
+
 The CSV is expected to have at least the following columns:
   Date, Description, Amount
 
@@ -23,14 +25,49 @@ Transactions with positive Amounts are incomes; negative are expenses.
 """
 
 import argparse
+import contextlib
+import csv
+import functools
+import io
 import logging
+import os
+import re
+import shutil
 import sys
+import tempfile
+from typing import Iterator
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pacsv
+except ImportError:  # pyarrow is optional; fall back to the pandas reader and string accessor.
+    pa = pc = pacsv = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to NumPy reductions.
+    njit = prange = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to the regex alternation.
+    ahocorasick = None
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional; fall back to Python's backtracking re.
+    re2 = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger("BudgetEditor")
 
+REQUIRED_COLUMNS = ["Date", "Description", "Amount"]
+CHUNK_SIZE = 200_000  # Rows per chunk when streaming through pandas.
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -42,8 +79,9 @@ def parse_args():
         help="Path to the input CSV file of transactions."
     )
     parser.add_argument(
-        "--output", "-o", required=True,
-        help="Path to the output CSV file with revised transactions."
+        "--output", "-o", default=None,
+        help="Path to the output CSV file with revised transactions. "
+             "If omitted, only the summary is produced."
     )
     parser.add_argument(
         "--income", "-I", type=float, required=True,
@@ -60,51 +98,311 @@ def parse_args():
     return parser.parse_args()
 
 
-def load_transactions(input_path: str) -> pd.DataFrame:
+def read_columns(input_path: str) -> list:
+    # Read just the header and ensure required columns exist.
     try:
-        df = pd.read_csv(input_path)
-        # Ensure required columns exist.
-        for col in ["Date", "Description", "Amount"]:
-            if col not in df.columns:
-                logger.error(f"Missing required column: {col}")
+        columns = list(pd.read_csv(input_path, nrows=0).columns)
+    except Exception as e:
+        logger.error(f"Failed to read CSV file {input_path}: {e}")
+        sys.exit(1)
+    for col in REQUIRED_COLUMNS:
+        if col not in columns:
+            logger.error(f"Missing required column: {col}")
+            sys.exit(1)
+    # The required columns lead, followed by any others in file order.
+    return REQUIRED_COLUMNS + [col for col in columns if col not in REQUIRED_COLUMNS]
+
+
+def open_transactions_arrow(input_path: str, columns: list):
+    # Streaming, multithreaded columnar parse of the given columns with an explicit schema.
+    return pacsv.open_csv(
+        input_path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20),
+        # Descriptions may contain quoted newlines.
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        # Every column (Amount included) is kept as text, so values are written back
+        # exactly as read; only empty cells become missing. Amount is parsed separately
+        # for the totals.
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: pa.string() for col in columns},
+            strings_can_be_null=True,
+            null_values=[""],
+        ),
+    )
+
+
+def iter_transactions(input_path: str, columns: list, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    # Yield the given columns chunk by chunk so memory stays bounded by the chunk size.
+    if pacsv is not None:
+        started = False
+        try:
+            for batch in open_transactions_arrow(input_path, columns):
+                started = True
+                yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+            return
+        except (pa.ArrowException, OSError) as e:
+            if started:
+                logger.error(f"Failed to read CSV file {input_path}: {e}")
                 sys.exit(1)
-        return df
+            # Values that do not fit the schema or I/O errors; let pandas report them.
+            logger.debug(f"Arrow CSV reader failed ({e}); falling back to pandas.")
+    try:
+        # usecols keeps the file's column order; reorder to match the header we write.
+        for chunk in pd.read_csv(input_path, usecols=columns, dtype=str, keep_default_na=False,
+                                 na_values=[""], chunksize=chunksize):
+            yield chunk[columns]
     except Exception as e:
         logger.error(f"Failed to read CSV file {input_path}: {e}")
         sys.exit(1)
 
 
-def filter_transactions(df: pd.DataFrame, centrelink_keyword: str, bad_keywords: list) -> pd.DataFrame:
-    # Remove Centrelink payments.
-    before = len(df)
-    df = df[~df["Description"].str.contains(centrelink_keyword, case=False, na=False)]
-    logger.info(f"Removed {before - len(df)} Centrelink transactions.")
+def filter_keywords(centrelink_keyword: str, bad_keywords: list) -> tuple:
+    # The Centrelink keyword and the bad keywords, deduplicated case-insensitively.
+    keywords = {}
+    for k in [centrelink_keyword] + bad_keywords:
+        if k:
+            keywords.setdefault(k.lower(), k)
+    return tuple(keywords.values())
 
-    # Remove transactions whose Description contains any bad keyword.
-    mask_bad = df["Description"].str.contains("|".join(bad_keywords), case=False, na=False)
-    before = len(df)
-    df = df[~mask_bad]
-    logger.info(f"Removed {before - len(df)} transactions matching bad keywords: {bad_keywords}")
 
-    return df
+@functools.lru_cache(maxsize=None)
+def build_filter_pattern(keywords: tuple) -> re.Pattern:
+    # Combine the keywords into one case-insensitive alternation so the
+    # Description column only has to be scanned once.
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
 
 
-def add_employment_income(df: pd.DataFrame, income: float) -> pd.DataFrame:
-    # Check if there is already an "Employment Income" row.
-    if not df["Description"].str.contains("Employment Income", case=False, na=False).any():
-        # Create a new row for Employment Income.
-        new_row = {"Date": pd.NaT, "Description": "Employment Income", "Amount": income}
-        df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
-        logger.info("Added Employment Income row.")
-    else:
+@functools.lru_cache(maxsize=None)
+def build_re2_pattern(keywords: tuple):
+    # Same alternation compiled by RE2, which guarantees linear-time matching.
+    return re2.compile("(?i)" + "|".join(map(re.escape, keywords)))
+
+
+@functools.lru_cache(maxsize=None)
+def build_keyword_automaton(keywords: tuple):
+    # Aho-Corasick automaton over the lowercased keywords: one linear pass per
+    # Description regardless of how many keywords there are.
+    automaton = ahocorasick.Automaton()
+    for k in keywords:
+        automaton.add_word(k.lower(), k)
+    automaton.make_automaton()
+    return automaton
+
+
+def match_descriptions(descriptions: pd.Series, keywords: tuple) -> np.ndarray:
+    # Boolean mask of Descriptions containing any keyword; missing values never match.
+    if not keywords:
+        return np.zeros(len(descriptions), dtype=bool)
+    # Statements repeat the same merchants over and over, so match each distinct
+    # Description once and gather the result back through the integer codes.
+    codes, uniques = pd.factorize(descriptions)
+    unique_mask = match_unique_descriptions(pd.Series(uniques), keywords)
+    # Missing values get code -1, which picks the trailing False.
+    return np.append(unique_mask, False)[codes]
+
+
+def match_unique_descriptions(descriptions: pd.Series, keywords: tuple) -> np.ndarray:
+    if pc is not None:
+        # Arrow's regex kernel (RE2, linear time) runs natively instead of per element in Python.
+        matches = pc.match_substring_regex(pa.array(descriptions, type=pa.string()),
+                                           build_filter_pattern(keywords).pattern, ignore_case=True)
+        return pc.fill_null(matches, False).to_numpy(zero_copy_only=False)
+    if ahocorasick is not None:
+        automaton = build_keyword_automaton(keywords)
+        return np.fromiter(
+            (isinstance(s, str) and next(automaton.iter(s.lower()), None) is not None
+             for s in descriptions.to_numpy()),
+            dtype=bool, count=len(descriptions),
+        )
+    if re2 is not None:
+        pattern = build_re2_pattern(keywords)
+        return np.fromiter(
+            (isinstance(s, str) and pattern.search(s) is not None for s in descriptions.to_numpy()),
+            dtype=bool, count=len(descriptions),
+        )
+    return descriptions.str.contains(build_filter_pattern(keywords), na=False).to_numpy(dtype=bool)
+
+
+def has_employment_income(df: pd.DataFrame) -> bool:
+    descriptions = df["Description"]
+    if pc is not None:
+        # Native substring kernel over the Arrow buffers; no Python strings are created.
+        matches = pc.match_substring(pa.array(descriptions, type=pa.string()), "employment income",
+                                     ignore_case=True)
+        return bool(pc.any(matches).as_py())
+    # Object column: the values already are Python strings, so short-circuit on the first match.
+    return any(isinstance(s, str) and "employment income" in s.lower()
+               for s in descriptions.to_numpy())
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def sum_pos_neg(a, drop):
+        # Single allocation-free pass over the amounts of the kept rows, split across cores.
+        p = 0.0
+        n = 0.0
+        for i in prange(a.shape[0]):
+            if drop[i]:
+                continue
+            v = a[i]
+            if v > 0:
+                p += v
+            else:
+                n += v
+        return p, n
+else:
+    sum_pos_neg = None
+
+
+def amount_values(amounts: pd.Series) -> np.ndarray:
+    # Parse the Amount text into float64 for the totals; missing amounts count as 0.
+    if pc is not None:
+        values = pc.cast(pa.array(amounts, type=pa.string()), pa.float64())
+        return pc.fill_null(values, 0.0).to_numpy(zero_copy_only=False)
+    return pd.to_numeric(amounts).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def sum_income_expenses(amounts: pd.Series, drop: np.ndarray) -> tuple:
+    # Sum incomes (Amount > 0) and expenses (Amount < 0) over the rows not dropped.
+    amt = amount_values(amounts)
+    if sum_pos_neg is not None:
+        pos, neg = sum_pos_neg(amt, drop)
+        return float(pos), float(neg)
+    # Without numba, avoid building sign masks: incomes = (sum + sum|x|) / 2 and
+    # expenses = (sum - sum|x|) / 2.
+    amt = amt[~drop]
+    total = amt.sum()
+    abs_total = np.abs(amt).sum()
+    return float((total + abs_total) / 2), float((total - abs_total) / 2)
+
+
+def filter_transactions(df: pd.DataFrame, keywords: tuple) -> tuple:
+    # Remove Centrelink payments and transactions whose Description contains any bad keyword.
+    # Returns the kept rows with their (income, expenses) totals, summed straight from the
+    # match mask so the kept frame is never scanned again.
+    drop = match_descriptions(df["Description"], keywords)
+    income, expenses = sum_income_expenses(df["Amount"], drop)
+    return df[~drop], income, expenses
+
+
+def drop_employment_income_row(output_path: str) -> None:
+    # Rewrite output_path without the provisional Employment Income row (the second line).
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with os.fdopen(fd, "wb") as tmp, open(output_path, "rb") as src:
+            tmp.write(src.readline())
+            src.readline()
+            shutil.copyfileobj(src, tmp)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_chunk(df: pd.DataFrame, out) -> None:
+    # Append df (without header) to the binary file out using Arrow's C++ CSV writer.
+    # Arrow can only quote per column type, so values are written unquoted and any
+    # chunk holding a delimiter, quote or newline goes through pandas instead, which
+    # quotes just those values like the header and income row. All columns are text
+    # as read from the input, so both writers emit the same values.
+    if pacsv is not None:
+        try:
+            buf = pa.BufferOutputStream()
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf,
+                            write_options=pacsv.WriteOptions(include_header=False, quoting_style="none"))
+        except pa.ArrowException:
+            pass
+        else:
+            out.write(buf.getvalue())
+            return
+    df.to_csv(out, header=False, index=False, lineterminator="\n")
+
+
+def write_revised_transactions(input_path: str, output_path, keywords: tuple,
+                               income: float) -> tuple:
+    # Stream the input CSV through the filter into output_path, adding the Employment Income
+    # row at the top if none survives filtering; with output_path None only the totals are
+    # computed. Returns the (total_income, total_expenses) of the revised transactions.
+    total_income = total_expenses = 0.0
+    removed = 0
+    income_row_exists = False
+    # All columns are carried through to the revised CSV; the summary alone only
+    # needs the required ones. Only the column selection differs between the two
+    # modes; Amount is parsed identically, so the summary never depends on --output.
+    columns = read_columns(input_path)
+    if not output_path:
+        columns = REQUIRED_COLUMNS
+
+    # The Employment Income row is written up front and the filtered rows are appended
+    # straight after it; only in the rare case that the input already carries such a
+    # row is the file rewritten without it. Writing and summing share the single pass
+    # over each chunk. Everything goes to a temporary file, which replaces the output
+    # (through any symlink, keeping its mode) only once the whole input has been
+    # processed. Outputs that aren't regular files, such as /dev/stdout or a named
+    # pipe, can't be replaced and are written in place from the temporary file instead.
+    tmp_path = None
+    if output_path:
+        target = os.path.realpath(output_path)
+        in_place = os.path.exists(target) and not os.path.isfile(target)
+        tmp_dir = tempfile.gettempdir() if in_place else os.path.dirname(target)
+        fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") if tmp_path else contextlib.nullcontext() as out:
+            if out is not None:
+                head = io.StringIO()
+                writer = csv.writer(head, lineterminator="\n")
+                writer.writerow(columns)
+                writer.writerow(["", "Employment Income", income] + [""] * (len(columns) - len(REQUIRED_COLUMNS)))
+                out.write(head.getvalue().encode("utf-8"))
+            for chunk in iter_transactions(input_path, columns):
+                kept, chunk_income, chunk_expenses = filter_transactions(chunk, keywords)
+                removed += len(chunk) - len(kept)
+                income_row_exists = income_row_exists or has_employment_income(kept)
+                if out is not None:
+                    write_chunk(kept, out)
+                total_income += chunk_income
+                total_expenses += chunk_expenses
+        if tmp_path:
+            if income_row_exists:
+                drop_employment_income_row(tmp_path)
+            if in_place:
+                with open(tmp_path, "rb") as src, open(output_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(tmp_path)
+            else:
+                if os.path.exists(target):
+                    shutil.copymode(target, tmp_path)
+                    st = os.stat(target)
+                    try:
+                        os.chown(tmp_path, st.st_uid, st.st_gid)
+                    except (AttributeError, PermissionError):
+                        pass  # Changing the owner needs privileges; keep ours.
+                else:
+                    # mkstemp creates the file 0600; give it the permissions open() would have.
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    os.chmod(tmp_path, 0o666 & ~umask)
+                os.replace(tmp_path, target)
+    except BaseException:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Removed {removed} Centrelink and bad-keyword transactions.")
+
+    if income_row_exists:
         logger.info("Employment Income row already exists; skipping addition.")
-    return df
+    else:
+        if income > 0:
+            total_income += income
+        else:
+            total_expenses += min(income, 0.0)
+        logger.info("Added Employment Income row.")
 
+    return total_income, total_expenses
 
-def compute_summary(df: pd.DataFrame, full_income: float) -> dict:
-    # Sum incomes (Amount > 0) and expenses (Amount < 0)
-    total_income = df[df["Amount"] > 0]["Amount"].sum()
-    total_expenses = df[df["Amount"] < 0]["Amount"].sum()
+
+def compute_summary(total_income: float, total_expenses: float, full_income: float) -> dict:
     balance = total_income + total_expenses  # expenses are negative
 
     # For the purpose of a balanced guide, use the full_time income (provided by user)
@@ -131,25 +429,26 @@ def main():
     args = parse_args()
     bad_keywords = [word.strip() for word in args.bad_keywords.split(",")]
 
-    # Load transactions.
-    df = load_transactions(args.input)
-
-    # Filter out Centrelink and bad transactions.
-    df_filtered = filter_transactions(df, args.centrelink_keyword, bad_keywords)
+    keywords = filter_keywords(args.centrelink_keyword, bad_keywords)
 
-    # Add employment income row if needed.
-    df_final = add_employment_income(df_filtered, args.income)
+    if args.output:
+        output_dir = os.path.dirname(os.path.abspath(args.output))
+        if not os.path.isdir(output_dir):
+            logger.error(f"Failed to write CSV file {args.output}: directory {output_dir} does not exist")
+            sys.exit(1)
 
-    # Write the revised CSV.
+    # Stream the transactions through the filter, add the employment income row if
+    # needed and write the revised CSV, accumulating the totals along the way.
     try:
-        df_final.to_csv(args.output, index=False)
-        logger.info(f"Revised transactions written to {args.output}")
+        total_income, total_expenses = write_revised_transactions(args.input, args.output, keywords, args.income)
+        if args.output:
+            logger.info(f"Revised transactions written to {args.output}")
     except Exception as e:
-        logger.error(f"Failed to write CSV file {args.output}: {e}")
+        logger.error(f"Failed to process {args.input}: {e}")
         sys.exit(1)
 
     # Compute and print the summary.
-    summary = compute_summary(df_final, args.income)
+    summary = compute_summary(total_income, total_expenses, args.income)
     print("\nBudget Summary Report")
     print("=====================")
     print(f"Full-Time Income Provided: ${summary['full_time_income']:.2f}")
@@ -1,22 +1,43 @@
-import requests
+import asyncio
+import diskcache
+import httpx
 import openai
 
+API_KEY = "YOUR_OPENAI_API_KEY"
+COMPLETIONS_URL = "https://api.openai.com/v1/completions"
+
+# Completions are cached on disk so re-running with the same prompt is free
+cache = diskcache.Cache("./.oa_cache")
+
 # Get AI-generated script
-def generate_script(topic):
-    api_key = "YOUR_OPENAI_API_KEY"
+async def generate_script(client, topic):
     prompt = f"Write a 5-minute YouTube script about {topic}."
-    
-    headers = {"Authorization": f"Bearer {api_key}"}
     data = {"model": "gpt-4", "prompt": prompt, "max_tokens": 400}
 
-    response = requests.post("https://api.openai.com/v1/completions", headers=headers, json=data)
-    return response.json()["choices"][0]["text"]
+    # Normalize the prompt for the key only, to raise the hit rate
+    key = (data["model"], prompt.strip().lower(), data["max_tokens"])
+    script = cache.get(key)
+    if script is None:
+        response = await client.post(COMPLETIONS_URL, json=data)
+        script = response.json()["choices"][0]["text"]
+        cache.set(key, script)
+    return script
+
+# Generate scripts for several topics concurrently over one keep-alive HTTP/2 connection
+async def generate_scripts(topics):
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    async with httpx.AsyncClient(http2=True, headers=headers, timeout=60) as client:
+        return await asyncio.gather(*[generate_script(client, topic) for topic in topics])
+
+async def main():
+    topic = "Top 5 AI Tools to Make Money"
+    script, = await generate_scripts([topic])
 
-topic = "Top 5 AI Tools to Make Money"
-script = generate_script(topic)
+    # Save script
+    with open("script.txt", "w") as file:
+        file.write(script)
 
-# Save script
-with open("script.txt", "w") as file:
-    file.write(script)
+    print("Script Generated!")
 
-print("Script Generated!")
+if __name__ == "__main__":
+    asyncio.run(main())
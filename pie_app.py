@@ -16,16 +16,26 @@ Author: [Your Name]
 Date: [Today's Date]
 """
 
+import asyncio
 import logging
+import os
 import random
+from collections import OrderedDict
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from transformers import pipeline, Pipeline
+import torch
+from transformers import AutoTokenizer, pipeline, Pipeline
 import uvicorn
 
+try:
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:  # optimum[onnxruntime] is optional; CPU falls back to PyTorch fp32.
+    ORTModelForCausalLM = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,14 +43,117 @@ logging.basicConfig(
 )
 logger = logging.getLogger("PIE")
 
-# Load the text generation pipeline (using GPT-2)
+# Directory holding the int8-quantized ONNX export of GPT-2 (created on first start).
+ONNX_MODEL_DIR = os.environ.get("PIE_ONNX_MODEL_DIR", "gpt2-int8")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+def load_int8_onnx_generator() -> Pipeline:
+    """GPT-2 exported to ONNX with dynamically quantized int8 weights, run by ONNX Runtime."""
+    if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        logger.info("Exporting GPT-2 to ONNX and quantizing to int8 in '%s'.", ONNX_MODEL_DIR)
+        quantizer = ORTQuantizer.from_pretrained(ORTModelForCausalLM.from_pretrained("gpt2", export=True))
+        quantizer.quantize(save_dir=ONNX_MODEL_DIR,
+                           quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False))
+    ort_model = ORTModelForCausalLM.from_pretrained(ONNX_MODEL_DIR, file_name=ONNX_MODEL_FILE,
+                                                    provider="CPUExecutionProvider")
+    return pipeline("text-generation", model=ort_model, tokenizer=AutoTokenizer.from_pretrained("gpt2"))
+
+# Load the text generation pipeline (using GPT-2). On a GPU the model runs in fp16;
+# the startup warmup call absorbs CUDA initialization. On CPU an int8 ONNX Runtime
+# model is used when optimum is installed.
 try:
-    text_generator: Pipeline = pipeline("text-generation", model="gpt2")
+    if torch.cuda.is_available():
+        text_generator: Pipeline = pipeline("text-generation", model="gpt2", device=0,
+                                            torch_dtype=torch.float16)
+    elif ORTModelForCausalLM is not None:
+        text_generator: Pipeline = load_int8_onnx_generator()
+    else:
+        text_generator: Pipeline = pipeline("text-generation", model="gpt2")
+    # GPT-2 has no pad token; reuse EOS so generate() doesn't warn on every call.
+    text_generator.model.config.pad_token_id = text_generator.tokenizer.eos_token_id
+    # Batched prompts are padded on the left so generation continues from real tokens.
+    text_generator.tokenizer.pad_token_id = text_generator.tokenizer.eos_token_id
+    text_generator.tokenizer.padding_side = "left"
     logger.info("Text generation model loaded successfully.")
 except Exception as e:
     logger.exception("Failed to load text generation model.")
     raise e
 
+# Micro-batching: concurrent /generate requests are collected for up to
+# BATCH_WINDOW seconds (or MAX_BATCH prompts) and run through the model together.
+MAX_BATCH = 16
+BATCH_WINDOW = 0.01
+# Total length (prompt + generated tokens) of each message, as for a single call.
+MAX_LENGTH = 60
+generation_queue: Optional[asyncio.Queue] = None
+
+def generate_batch(prompts: list) -> list:
+    """
+    Greedily generate a continuation for each prompt in one batched model call.
+
+    Each prompt gets the same number of new tokens it would get on its own
+    (MAX_LENGTH minus its own token length, at least one), so the output does not
+    depend on which other prompts share the batch.
+    """
+    tokenizer = text_generator.tokenizer
+    budgets = [max(MAX_LENGTH - len(ids), 1) for ids in tokenizer(prompts)["input_ids"]]
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(text_generator.device)
+    with torch.no_grad():
+        sequences = text_generator.model.generate(
+            **inputs, max_new_tokens=max(budgets), do_sample=False,
+            pad_token_id=tokenizer.eos_token_id)
+    # Greedy decoding is prefix-stable, so truncating the longer run to each
+    # prompt's own budget gives what a standalone call would have produced.
+    width = inputs["input_ids"].shape[1]
+    return [prompt + tokenizer.decode(sequence[width:width + budget], skip_special_tokens=True)
+            for prompt, sequence, budget in zip(prompts, sequences, budgets)]
+
+async def batch_generation_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await generation_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(items) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(generation_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        prompts = [prompt for prompt, _ in items]
+        try:
+            # Run the blocking model call off the event loop.
+            outputs = await loop.run_in_executor(None, generate_batch, prompts)
+        except Exception as e:
+            if len(items) == 1:
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+                continue
+            # Don't fail unrelated requests: retry the batch one prompt at a time.
+            logger.warning("Batch of %d prompts failed (%s); retrying individually.", len(items), e)
+            for prompt, future in items:
+                try:
+                    output = (await loop.run_in_executor(None, generate_batch, [prompt]))[0]
+                except Exception as item_error:
+                    if not future.done():
+                        future.set_exception(item_error)
+                else:
+                    if not future.done():
+                        future.set_result(output)
+            continue
+        logger.debug("Generated a batch of %d prompts.", len(prompts))
+        for (_, future), output in zip(items, outputs):
+            if not future.done():
+                future.set_result(output)
+
+async def submit(prompt: str) -> str:
+    """Queue a prompt for the batch worker and wait for its generated text."""
+    future = asyncio.get_running_loop().create_future()
+    await generation_queue.put((prompt, future))
+    return await future
+
 # Dummy persuasion patterns and mapping to psychographic profiles.
 PERSUASION_PATTERNS = {
     "urgency": "Act now—this offer expires soon!",
@@ -49,11 +162,38 @@ PERSUASION_PATTERNS = {
     "scarcity": "Hurry, only a few items remain in stock!"
 }
 
+# Generations are greedy and each prompt's length budget is independent of the batch
+# it runs in (see generate_batch), so a result can be cached per (profile, base_message).
+# The cache holds futures, so identical requests in flight share one model call.
+GENERATION_CACHE_SIZE = 4096
+generation_cache: "OrderedDict[tuple, asyncio.Future]" = OrderedDict()
+
+async def generate_cached(profile: str, base_message: str) -> str:
+    key = (profile, base_message)
+    future = generation_cache.get(key)
+    if future is None:
+        future = asyncio.ensure_future(submit(f"{base_message} {PERSUASION_PATTERNS[profile]}"))
+        generation_cache[key] = future
+        if len(generation_cache) > GENERATION_CACHE_SIZE:
+            generation_cache.popitem(last=False)
+    else:
+        generation_cache.move_to_end(key)
+    try:
+        # Shielded so a disconnecting client doesn't cancel a generation others await.
+        return await asyncio.shield(future)
+    except Exception:
+        if generation_cache.get(key) is future:
+            del generation_cache[key]
+        raise
+
+# Profile names and a dedicated RNG, built once rather than per request.
+PERSUASION_PROFILES = tuple(PERSUASION_PATTERNS)
+profile_rng = random.Random()
+
 # Dummy function to get a user's target persuasion profile.
 def get_target_emotion_profile(user_id: str) -> str:
     # In production, this would analyze public data and past interactions.
-    profiles = list(PERSUASION_PATTERNS.keys())
-    selected = random.choice(profiles)
+    selected = PERSUASION_PROFILES[profile_rng.randrange(len(PERSUASION_PROFILES))]
     logger.debug(f"User {user_id} assigned profile: {selected}")
     return selected
 
@@ -82,6 +222,18 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": "Internal Server Error. Please try again later."},
     )
 
+@app.on_event("startup")
+def warmup_text_generator():
+    """Run one dummy generation so model/CUDA initialization happens before the first request."""
+    generate_batch(["warmup"])
+    logger.info("Text generation model warmed up.")
+
+@app.on_event("startup")
+async def start_batch_generation_worker():
+    global generation_queue
+    generation_queue = asyncio.Queue()
+    app.state.batch_worker = asyncio.create_task(batch_generation_worker())
+
 @app.get("/health", summary="Health Check", tags=["Utility"])
 async def health_check():
     """Simple health check endpoint."""
@@ -111,13 +263,9 @@ async def generate_persuasive_message(request_data: PersuasionRequest):
             raise ValueError("No persuasive pattern found for the determined profile.")
         logger.info("Using persuasion pattern for profile '%s': %s", profile, pattern)
         
-        # Create a prompt combining the base message and the persuasive pattern.
-        prompt = f"{base_message} {pattern}"
-        logger.debug("Text generation prompt: %s", prompt)
-        
-        # Generate persuasive text.
-        generated_output = text_generator(prompt, max_length=60, num_return_sequences=1)
-        persuasive_message = generated_output[0]["generated_text"]
+        # Generate persuasive text from the base message and the persuasive pattern.
+        logger.debug("Text generation prompt: %s %s", base_message, pattern)
+        persuasive_message = await generate_cached(profile, base_message)
         logger.info("Generated persuasive message for user '%s'", user_id)
     except Exception as e:
         logger.exception("Error generating persuasive message: %s", e)